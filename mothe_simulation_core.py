@@ -1,12 +1,30 @@
 # mothe_simulation_core.py
 # Refactored for web dashboard integration
 
-import random
 import logging
 import json
 import subprocess
 import time
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from itertools import chain
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Listed in requirements.txt; plain Python kernels only as a last resort
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+except ImportError:  # orjson is optional; compact stdlib encoding otherwise
+    def _dumps(obj):
+        return json.dumps(obj, separators=(',', ':'), default=str)
 
 # --- Configuration (can be modified externally or through UI) ---
 # IMPORTANT: For live web deployment, actual bitcoin-cli calls will be disabled or simulated.
@@ -35,99 +53,170 @@ BCP_RECIPIENT_ADDRESS = "bcrt1qtc0jfat4wdu5wsa5xump6n4gqsn9kh32kgf9ee"
 # BITCOIN_CLI_PATH = r'"C:\Program Files\Bitcoin\daemon\bitcoin-cli.exe"' # Commented for web
 
 GRID_NODES = ["RegionAlpha", "RegionBeta", "RegionGamma"]
+_INV_N_NODES = 1.0 / len(GRID_NODES) # Each region's share of generated energy
 
-# --- Simulation Classes (Unchanged, as they represent core logic) ---
+MAX_LOG_ENTRIES = 50 # Live operational log shown on the dashboard
+MAX_EVENT_ENTRIES = 500 # Per-category event history (supply chain, orbital, ids, ...)
 
-class SolarNodeController:
-    def __init__(self, node_name):
-        self.node_name = node_name
-        self.irradiance = 0.0  # W/m2 simulated
-        self.temperature = 25.0  # Celsius simulated
-        self.panel_health = 100.0  # Percent
-        self.output_power_mwh = 0.0
+# Single NumPy (PCG64) generator shared by every random draw in the simulation.
+# Use seed_rng() to make a run reproducible.
+_rng = np.random.default_rng()
 
-    def read_sensors(self):
-        self.irradiance = random.uniform(800, 1200)
-        self.temperature = random.uniform(15, 45)
-        self.panel_health = max(80, self.panel_health - random.uniform(0, 0.01))
-
-    def calibrate_output(self):
-        base_power = (self.irradiance / 1000) * 0.3
-        health_factor = self.panel_health / 100
-        temp_factor = max(0.75, 1 - (self.temperature - 25) * 0.01)
-        self.output_power_mwh = base_power * health_factor * temp_factor * (SIM_INTERVAL_SECONDS / 3600)
-        # logging.info(f"[SOLAR] {self.node_name} output {self.output_power_mwh:.6f} MWh (irradiance {self.irradiance:.1f} W/m2, temp {self.temperature:.1f}C, health {self.panel_health:.2f}%)")
-        return self.output_power_mwh
 
-    def generate_energy(self):
-        self.read_sensors()
-        return self.calibrate_output()
+def seed_rng(seed=None):
+    """Re-creates the shared generator; the same seed replays the same simulation."""
+    global _rng
+    _rng = np.random.default_rng(seed)
 
 
-class UniversalDistributionNode:
-    def __init__(self, region_name):
-        self.region_name = region_name
-        self.energy_balance = 0.0
+# ASP (AI Sovereignty Protocol) alert chance: a uniform threat level in
+# [1000, 9000] exceeding the 8500 quarantine threshold
+_ASP_ALERT_PROBABILITY = (9000 - 8500) / (9000 - 1000)
 
-    def balance_and_distribute(self, amount):
-        self.energy_balance += amount / len(GRID_NODES)
-        # logging.info(f"[DISTRIBUTION] {self.region_name} distributing {self.energy_balance:.6f} MWh")
-        # self.energy_balance = 0.0 # Don't zero out immediately, allow accumulation for display
+_DT_HOURS = SIM_INTERVAL_SECONDS / 3600 # Length of one simulation step in hours
 
+# --- Simulation Classes ---
 
-class AISovereigntyProtocol:
-    def __init__(self):
-        # logging.info("[ASP] AI Sovereignty Protocol Initialized")
-        pass
+class SolarArray:
+    """
+    Structure-of-arrays state for every solar node in GRID_NODES.
+    Sensor noise is drawn in one call per step; _step_kernel scales it into
+    the sensor readings and computes the output.
+    """
+    __slots__ = ('node_names', 'irradiance', 'temperature', 'panel_health', 'output_power_mwh', 'sensor_draws')
 
-    def monitor_grid_integrity(self, threat_level):
-        if threat_level > 8500:
-            # logging.warning("[ASP ALERT] Threat Detected and Quarantined")
-            return True
-        return False
+    def __init__(self, node_names):
+        self.node_names = list(node_names)
+        n = len(self.node_names)
+        self.irradiance = np.zeros(n)  # W/m2 simulated
+        self.temperature = np.full(n, 25.0)  # Celsius simulated
+        self.panel_health = np.full(n, 100.0)  # Percent
+        self.output_power_mwh = np.zeros(n)
+        self.sensor_draws = np.empty((3, n))  # Uniform [0, 1) rows: irradiance, temperature, health decay
 
+    def read_sensors(self):
+        _rng.random(out=self.sensor_draws)
 
-def ai_boring_search_for_gold(minutes):
-    found = round(random.uniform(0, 0.002) * minutes, 6)
-    # logging.info(f"[GOLD SEARCH] Found {found} units of gold")
-    return found
 
+class DistributionArray:
+    """
+    Structure-of-arrays energy balances for every region in GRID_NODES.
+    Balances are updated in place by _step_kernel.
+    """
+    __slots__ = ('region_names', 'energy_balance')
 
-def ai_boring_search_for_oil(minutes):
-    found = round(random.uniform(0, 0.003) * minutes, 6)
-    # logging.info(f"[OIL SEARCH] Found {found} barrels of oil")
-    return found
+    def __init__(self, region_names):
+        self.region_names = list(region_names)
+        self.energy_balance = np.zeros(len(self.region_names))
 
 
-def quiet_nuclear_protocol_scan(minutes):
-    count = random.choice([0, 1])
-    # logging.info(f"[NUCLEAR SCAN] Nuclear signatures detected: {count}")
-    return count
+@njit(cache=True, fastmath=True)
+def _step_kernel(draws, irr, temp, health, output, balance, dt_hours, inv_n):
+    """
+    Scales the uniform draws into sensor readings (irradiance 800-1200 W/m2,
+    temperature 15-45 C, health decay up to 0.01% with an 80% floor), computes
+    per-node solar output for one interval, accumulates an inv_n share of it
+    into every regional balance and returns the total generated MWh.
+    """
+    n = irr.shape[0]
+    total = 0.0
+    for i in range(n):
+        irr[i] = 800 + 400 * draws[0, i]
+        temp[i] = 15 + 30 * draws[1, i]
+        health[i] = max(80.0, health[i] - 0.01 * draws[2, i])
+        temp_factor = max(0.75, 1 - (temp[i] - 25) * 0.01)
+        output[i] = (irr[i] / 1000) * 0.3 * (health[i] / 100) * temp_factor * dt_hours
+        total += output[i]
+    share = total * inv_n
+    for i in range(n):
+        balance[i] += share
+    return total
+
+
+_GOLD_RATE_PER_MINUTE = 0.002 # Max gold units found per minute of boring
+_OIL_RATE_PER_MINUTE = 0.003 # Max oil barrels found per minute of boring
+
+
+def _boring_batch(minutes):
+    """
+    Runs the gold search, oil search and nuclear scan for one step with a
+    single batch of uniform draws.
+    Returns (gold_found, oil_found, nuclear_signatures).
+    """
+    gold, oil, nuc = _rng.random(3).tolist()
+    return (
+        round(gold * _GOLD_RATE_PER_MINUTE * minutes, 6),
+        round(oil * _OIL_RATE_PER_MINUTE * minutes, 6),
+        int(nuc < 0.5)
+    )
+
+
+MEDS = ("antivirals", "antibiotics", "vaccines")
+FINDINGS = (
+    "Gold Vein Located",
+    "Tectonic Stress Point Detected",
+    "Uranium Trace Signature",
+    "No Anomaly"
+)
 
 
-def simulate_supply_chain(region):
-    water_units = random.randint(10000, 20000)
-    meds = random.choice(["antivirals", "antibiotics", "vaccines"])
-    log = f"[SUPPLY_CHAIN] Delivered {water_units}L water + {meds} to {region}"
-    return log
+def regional_events(ts_prefix, regions):
+    """
+    Samples supply chain deliveries, orbital scans and sovereign IDs for
+    every region from one batch of uniform draws.
+    Returns three lists of timestamped log lines (supply chain, orbital, ids).
+    """
+    # One (5, n) draw scaled per field; .tolist() keeps the formatting on plain floats
+    waters, meds, findings, ids, reps = _rng.random((5, len(regions))).tolist()
 
+    sc_logs = [f"{ts_prefix}[SUPPLY_CHAIN] Delivered {10000 + int(w * 10001)}L water + {MEDS[int(m * len(MEDS))]} to {r}"
+               for r, w, m in zip(regions, waters, meds)]
+    orb_logs = [f"{ts_prefix}[ORBITAL SCAN] Satellite scan of {r}: {FINDINGS[int(f * len(FINDINGS))]}"
+                for r, f in zip(regions, findings)]
+    id_logs = [f"{ts_prefix}[SOVEREIGN ID] SEED_{1000 + int(i * 9000)}_{r[:2].upper()} active in {r} (rep: {round(0.5 + 0.5 * rep, 2)})"
+               for r, i, rep in zip(regions, ids, reps)]
+    return sc_logs, orb_logs, id_logs
 
-def simulate_orbital_scan(region):
-    findings = random.choice([
-        "Gold Vein Located",
-        "Tectonic Stress Point Detected",
-        "Uranium Trace Signature",
-        "No Anomaly"
-    ])
-    log = f"[ORBITAL SCAN] Satellite scan of {region}: {findings}"
-    return log
 
+# --- Simulation State ---
 
-def register_sovereign_id(region):
-    seed_id = f"SEED_{random.randint(1000, 9999)}_{region[:2].upper()}"
-    rep_score = round(random.uniform(0.5, 1.0), 2)
-    log = f"[SOVEREIGN ID] {seed_id} active in {region} (rep: {rep_score})"
-    return log
+@dataclass(slots=True)
+class SimState:
+    """
+    Typed, slotted container for all simulation state.
+    Created once per session and mutated in place by run_simulation_step.
+    """
+    total_mwh: float = 0.0
+    gold: float = 0.0
+    oil: float = 0.0
+    nuclear_signatures: int = 0
+    anomalies: deque = field(default_factory=lambda: deque(maxlen=MAX_EVENT_ENTRIES))
+    supply_chain: deque = field(default_factory=lambda: deque(maxlen=MAX_EVENT_ENTRIES))
+    orbital: deque = field(default_factory=lambda: deque(maxlen=MAX_EVENT_ENTRIES))
+    ids: deque = field(default_factory=lambda: deque(maxlen=MAX_EVENT_ENTRIES))
+    bcp_transactions: deque = field(default_factory=lambda: deque(maxlen=MAX_EVENT_ENTRIES)) # For simulated BCP logs
+    logs: deque = field(default_factory=lambda: deque(maxlen=MAX_LOG_ENTRIES)) # For live operational logs
+    sim_time: datetime = field(default_factory=datetime.utcnow) # Live object; formatted only for display/export
+    sim_step_count: int = 0
+    solar_array: SolarArray = field(default_factory=lambda: SolarArray(GRID_NODES))
+    distribution_array: DistributionArray = field(default_factory=lambda: DistributionArray(GRID_NODES))
+
+    def as_dict(self):
+        """Returns the JSON-friendly part of the state (no simulation objects)."""
+        return {
+            "energy": {"total_mwh": float(self.total_mwh)},
+            "gold": self.gold,
+            "oil": self.oil,
+            "nuclear_signatures": self.nuclear_signatures,
+            "anomalies": list(self.anomalies),
+            "supply_chain": list(self.supply_chain),
+            "orbital": list(self.orbital),
+            "ids": list(self.ids),
+            "bcp_transactions": list(self.bcp_transactions),
+            "logs": list(self.logs),
+            "current_sim_time": self.sim_time.isoformat(),
+            "sim_step_count": self.sim_step_count,
+        }
 
 
 # --- Wallet & BCP Functions (Simulated for Web) ---
@@ -159,107 +248,74 @@ def export_results_sim(simulation_results_data):
     Simulated export for web dashboard.
     Does NOT write to local files directly on the server for continuous updates.
     The web app will handle display.
+    Accepts a SimState or a plain dict; output is compact (not pretty-printed) JSON.
     """
     # logging.info("[EXPORT] Simulation results prepared for display.")
-    return json.dumps(simulation_results_data, indent=2)
+    if isinstance(simulation_results_data, SimState):
+        simulation_results_data = simulation_results_data.as_dict()
+    return _dumps(simulation_results_data)
 
 
 # --- Core Simulation Step Function ---
 
-def run_simulation_step(current_results, current_time, sim_interval_seconds):
+def run_simulation_step(state, current_time, sim_interval_seconds):
     """
     Runs one step of the Epoch Zero simulation.
-    Updates and returns the simulation results.
+    Updates the SimState in place and returns it.
     """
-    # Initialize objects if not already present in current_results (first run)
-    if 'solar_nodes' not in current_results:
-        current_results['solar_nodes'] = [SolarNodeController(region) for region in GRID_NODES]
-    if 'distribution_nodes' not in current_results:
-        current_results['distribution_nodes'] = [UniversalDistributionNode(name) for name in GRID_NODES]
-    if 'asp' not in current_results:
-        current_results['asp'] = AISovereigntyProtocol()
-
-    solar_nodes = current_results['solar_nodes']
-    distribution_nodes = current_results['distribution_nodes']
-    asp = current_results['asp']
-
-    # Initialize core metrics if not present
-    if 'energy' not in current_results:
-        current_results['energy'] = {'total_mwh': 0.0}
-    if 'gold' not in current_results:
-        current_results['gold'] = 0.0
-    if 'oil' not in current_results:
-        current_results['oil'] = 0.0
-    if 'nuclear_signatures' not in current_results:
-        current_results['nuclear_signatures'] = 0
-    if 'anomalies' not in current_results:
-        current_results['anomalies'] = []
-    if 'supply_chain' not in current_results:
-        current_results['supply_chain'] = []
-    if 'orbital' not in current_results:
-        current_results['orbital'] = []
-    if 'ids' not in current_results:
-        current_results['ids'] = []
-    if 'bcp_transactions' not in current_results:
-        current_results['bcp_transactions'] = []
-    if 'logs' not in current_results:
-        current_results['logs'] = [] # New: collect real-time logs for display
-
-    # Generate energy from all solar nodes and sum
-    generated_mwh_this_interval = sum([node.generate_energy() for node in solar_nodes])
-    current_results['energy']['total_mwh'] += generated_mwh_this_interval
-    current_results['logs'].append(f"[{current_time.strftime('%H:%M:%S')}] [ENERGY] Generated {generated_mwh_this_interval:.6f} MWh.")
-
-
-    # Distribute energy
-    for node in distribution_nodes:
-        node.balance_and_distribute(generated_mwh_this_interval)
-        # Note: self.energy_balance is *accumulating* in the node object for display clarity
-        current_results['logs'].append(f"[{current_time.strftime('%H:%M:%S')}] [DISTRIBUTION] {node.region_name} current balance {node.energy_balance:.6f} MWh.")
-
-
-    # Regional operations
-    for region in GRID_NODES:
-        # Simulate Supply Chain
-        sc_log = simulate_supply_chain(region)
-        current_results['supply_chain'].append(f"[{current_time.strftime('%H:%M:%S')}] {sc_log}")
-        current_results['logs'].append(f"[{current_time.strftime('%H:%M:%S')}] {sc_log}")
-
-        # Simulate Orbital Scan
-        orb_log = simulate_orbital_scan(region)
-        current_results['orbital'].append(f"[{current_time.strftime('%H:%M:%S')}] {orb_log}")
-        current_results['logs'].append(f"[{current_time.strftime('%H:%M:%S')}] {orb_log}")
-
-        # Register Sovereign ID
-        id_log = register_sovereign_id(region)
-        current_results['ids'].append(f"[{current_time.strftime('%H:%M:%S')}] {id_log}")
-        current_results['logs'].append(f"[{current_time.strftime('%H:%M:%S')}] {id_log}")
+    solar_array = state.solar_array
+    distribution_array = state.distribution_array
+
+    # Format the log timestamp once per step instead of per entry
+    prefix = f"[{current_time.hour:02d}:{current_time.minute:02d}:{current_time.second:02d}] "
+
+    # Generate energy from all solar nodes and distribute it in one compiled pass
+    solar_array.read_sensors()
+    generated_mwh_this_interval = _step_kernel(
+        solar_array.sensor_draws,
+        solar_array.irradiance,
+        solar_array.temperature,
+        solar_array.panel_health,
+        solar_array.output_power_mwh,
+        distribution_array.energy_balance,
+        _DT_HOURS,
+        _INV_N_NODES
+    )
+    state.total_mwh += generated_mwh_this_interval
+    state.logs.append(f"{prefix}[ENERGY] Generated {generated_mwh_this_interval:.6f} MWh.")
+
+
+    # Distribution balances are *accumulating* for display clarity
+    for region_name, energy_balance in zip(distribution_array.region_names, distribution_array.energy_balance):
+        state.logs.append(f"{prefix}[DISTRIBUTION] {region_name} current balance {energy_balance:.6f} MWh.")
+
+
+    # Regional operations (supply chain, orbital scan, sovereign ID)
+    sc_logs, orb_logs, id_logs = regional_events(prefix, GRID_NODES)
+    state.supply_chain.extend(sc_logs)
+    state.orbital.extend(orb_logs)
+    state.ids.extend(id_logs)
+    state.logs.extend(chain(sc_logs, orb_logs, id_logs))
 
     # ASP monitoring
-    if asp.monitor_grid_integrity(random.uniform(1000, 9000)):
-        anomaly_msg = f"[{current_time.strftime('%H:%M:%S')}] [ASP ALERT] Threat Quarantined"
-        current_results['anomalies'].append(anomaly_msg)
-        current_results['logs'].append(anomaly_msg)
+    if _rng.random() < _ASP_ALERT_PROBABILITY:
+        anomaly_msg = f"{prefix}[ASP ALERT] Threat Quarantined"
+        state.anomalies.append(anomaly_msg)
+        state.logs.append(anomaly_msg)
 
     # Resource searches
-    gold_found = ai_boring_search_for_gold(sim_interval_seconds / 60)
-    oil_found = ai_boring_search_for_oil(sim_interval_seconds / 60)
-    nuc_found = quiet_nuclear_protocol_scan(sim_interval_seconds / 60)
-
-    current_results['gold'] += gold_found
-    current_results['logs'].append(f"[{current_time.strftime('%H:%M:%S')}] [GOLD SEARCH] Found {gold_found:.6f} units of gold. Total: {current_results['gold']:.6f}")
-
-    current_results['oil'] += oil_found
-    current_results['logs'].append(f"[{current_time.strftime('%H:%M:%S')}] [OIL SEARCH] Found {oil_found:.6f} barrels of oil. Total: {current_results['oil']:.6f}")
+    gold_found, oil_found, nuc_found = _boring_batch(sim_interval_seconds / 60)
 
-    current_results['nuclear_signatures'] += nuc_found
-    current_results['logs'].append(f"[{current_time.strftime('%H:%M:%S')}] [NUCLEAR SCAN] Detected {nuc_found} nuclear signatures. Total: {current_results['nuclear_signatures']}")
+    state.gold += gold_found
+    state.logs.append(f"{prefix}[GOLD SEARCH] Found {gold_found:.6f} units of gold. Total: {state.gold:.6f}")
 
+    state.oil += oil_found
+    state.logs.append(f"{prefix}[OIL SEARCH] Found {oil_found:.6f} barrels of oil. Total: {state.oil:.6f}")
 
-    # Keep logs manageable - only last 50 entries
-    current_results['logs'] = current_results['logs'][-50:]
+    state.nuclear_signatures += nuc_found
+    state.logs.append(f"{prefix}[NUCLEAR SCAN] Detected {nuc_found} nuclear signatures. Total: {state.nuclear_signatures}")
 
-    return current_results
+    return state
 
 # NOTE: The main execution block (`if __name__ == "__main__":`) is removed
 # from this core script, as it will be orchestrated by the Streamlit app.
\ No newline at end of file